@@ -1,21 +1,55 @@
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 
 from openpecha.serializers.hfml import HFMLSerializer
+from openpecha.utils import load_yaml
+
+DONE_MARKER = '.done'
+
+
+@lru_cache(maxsize=None)
+def get_index_layer(opf_path):
+    return load_yaml(Path(opf_path) / "index.yml")
 
 
 def get_text(text_id, opf_path, output_dir):
-    hfml_serializer = HFMLSerializer(opf_path, text_id, layers=[])
+    hfml_serializer = HFMLSerializer(
+        opf_path, text_id, layers=[], index_layer=get_index_layer(opf_path)
+    )
     hfml_serializer.serialize(output_dir, text_id)
 
+
+def process_text(text_id, opf_path='./data/P000002.opf'):
+    # output_dir gets rmtree'd, so it must be a single entry under ./data/text
+    if text_id in ('', '.', '..') or Path(text_id).name != text_id:
+        return f'{text_id!r} failed: invalid text id'
+    output_dir = Path(f'./data/text/{text_id}')
+    done_marker = output_dir / DONE_MARKER
+    if done_marker.is_file():
+        return
+    try:
+        # no marker means a previous run was interrupted mid-write; start clean
+        shutil.rmtree(output_dir, ignore_errors=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        get_text(text_id, opf_path, output_dir)
+        done_marker.touch()
+    except Exception as e:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        return f'{text_id} failed: {e!r}'
+
+
+def read_text_ids(text_list_path):
+    text_ids = Path(text_list_path).read_text(encoding='utf-8').splitlines()
+    text_ids = [text_id.strip() for text_id in text_ids if text_id.strip()]
+    # duplicates would be processed concurrently and clobber each other's output
+    return list(dict.fromkeys(text_ids))
+
 if __name__ == "__main__":
-    text_ids = Path('./data/text_list.txt').read_text(encoding='utf-8').splitlines()
-    for text_id in text_ids:
-        opf_path = './data/P000002.opf'
-        output_dir = Path(f'./data/text/{text_id}')
-        output_dir.mkdir(exist_ok=True, parents=True)
-        try:
-            get_text(text_id, opf_path, output_dir)
-        except:
-            output_dir.rmdir()
-            print(f'{text_id} failed')
+    text_ids = read_text_ids('./data/text_list.txt')
+    with ProcessPoolExecutor() as pool:
+        for msg in pool.map(process_text, text_ids, chunksize=8):
+            if msg:
+                print(msg)
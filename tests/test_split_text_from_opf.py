@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+
+from text_spliter import split_text_from_opf
+from text_spliter.split_text_from_opf import DONE_MARKER, process_text, read_text_ids
+
+
+def fake_get_text(calls, fail=False):
+    def get_text(text_id, opf_path, output_dir):
+        calls.append(text_id)
+        volume_dir = output_dir / "P000002"
+        volume_dir.mkdir()
+        (volume_dir / "v001.txt").write_text("text", encoding="utf-8")
+        if fail:
+            raise ValueError("serialization failed")
+
+    return get_text
+
+
+def test_failed_text_is_removed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    monkeypatch.setattr(split_text_from_opf, "get_text", fake_get_text(calls, fail=True))
+
+    msg = process_text("T001")
+
+    assert msg.startswith("T001 failed")
+    assert not Path("data/text/T001").exists()
+
+
+def test_completed_text_is_skipped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    monkeypatch.setattr(split_text_from_opf, "get_text", fake_get_text(calls))
+
+    assert process_text("T001") is None
+    assert (Path("data/text/T001") / DONE_MARKER).is_file()
+    assert process_text("T001") is None
+    assert calls == ["T001"]
+
+
+def test_partial_text_is_redone(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    partial_dir = Path("data/text/T001/P000002")
+    partial_dir.mkdir(parents=True)
+    (partial_dir / "stale.txt").write_text("partial", encoding="utf-8")
+    calls = []
+    monkeypatch.setattr(split_text_from_opf, "get_text", fake_get_text(calls))
+
+    assert process_text("T001") is None
+    assert calls == ["T001"]
+    assert not (partial_dir / "stale.txt").exists()
+    assert (partial_dir / "v001.txt").is_file()
+    assert (Path("data/text/T001") / DONE_MARKER).is_file()
+
+
+def test_filesystem_error_is_reported(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("data").mkdir()
+    Path("data/text").write_text("not a directory", encoding="utf-8")
+    calls = []
+    monkeypatch.setattr(split_text_from_opf, "get_text", fake_get_text(calls))
+
+    msg = process_text("T001")
+
+    assert msg.startswith("T001 failed")
+    assert calls == []
+
+
+def test_repeated_text_id_is_read_once(tmp_path):
+    text_list = tmp_path / "text_list.txt"
+    text_list.write_text("T002\nT001 \n\nT002\nT001\n", encoding="utf-8")
+
+    assert read_text_ids(text_list) == ["T002", "T001"]
+
+
+@pytest.mark.parametrize("text_id", ["", ".", "..", "T001/..", "../T001"])
+def test_path_like_text_id_is_rejected(tmp_path, monkeypatch, text_id):
+    monkeypatch.chdir(tmp_path)
+    done_dir = Path("data/text/T001")
+    done_dir.mkdir(parents=True)
+    (done_dir / DONE_MARKER).touch()
+    calls = []
+    monkeypatch.setattr(split_text_from_opf, "get_text", fake_get_text(calls))
+
+    msg = process_text(text_id)
+
+    assert "failed: invalid text id" in msg
+    assert (done_dir / DONE_MARKER).is_file()
+    assert calls == []